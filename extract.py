@@ -1,13 +1,44 @@
 import pandas as pd
+import numpy as np
 from bcb import sgs
+import argparse
+import asyncio
 import datetime
+import json
+import xlsxwriter
 from openpyxl.utils import get_column_letter, column_index_from_string
 import sys
 import time
 import os
-import shutil
+import functools
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from typing import List, Optional
 
+# Worker logging: records are enqueued in constant time and drained by a
+# dedicated listener thread, so download workers never serialize on the
+# stdout lock. Stopped (flushed) in main's finally block.
+_log_queue: queue.Queue = queue.Queue(-1)
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+
+logger = logging.getLogger(__name__)
+logger.addHandler(QueueHandler(_log_queue))
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+# httpx enables the async download path; without it we fall back to the
+# threaded python-bcb client. orjson is a drop-in faster JSON parser.
+try:
+    import httpx
+except ImportError:
+    httpx = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # --- Global Configurations ---
 START_DATE = '2010-01-01'
 
@@ -19,25 +50,279 @@ BACKUP_FILE = os.path.join(BASE_DIR, 'Resultado_BCB_BACKUP.xlsx')
 
 BATCH_SIZE = 10  # Batch size for API requests
 
+# Precomputed Excel column letters, 1-based up to column 1024 (far beyond any
+# configured sheet width); avoids per-call letter/index conversion dispatch.
+_COL_LETTERS = [None] + [get_column_letter(i) for i in range(1, 1025)]
+_COL_INDEX = {letter: i for i, letter in enumerate(_COL_LETTERS) if letter}
+
+# Local series cache (Parquet, one file per code). Monthly series change at
+# most once a day, so warm entries skip the network entirely.
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.bcb_cache')
+CACHE_TTL = datetime.timedelta(days=1)
+
+def _cache_path(code: int) -> str:
+    return os.path.join(CACHE_DIR, f'{code}.parquet')
+
+def load_cached_series(code: int, ttl: Optional[datetime.timedelta] = CACHE_TTL) -> Optional[pd.DataFrame]:
+    """
+    Returns the cached DataFrame for a series code if present and fresh, else None.
+
+    Args:
+        code: Series code.
+        ttl: Maximum cache age before the entry is considered stale.
+             Pass None to ignore freshness and return any cached data.
+    """
+    path = _cache_path(code)
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except OSError:
+        return None
+    if ttl is not None and age > ttl.total_seconds():
+        return None
+    try:
+        return pd.read_parquet(path)
+    except Exception:
+        return None  # Corrupt entry: treat as cache miss and re-download
+
+def store_cached_series(code: int, frame: pd.DataFrame) -> None:
+    """
+    Persists a downloaded series to the local Parquet cache. Failures are
+    non-fatal: the cache is an optimization, not a requirement.
+    """
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        frame = frame.dropna()
+        frame.columns = [str(c) for c in frame.columns]  # Parquet requires string column names
+        frame.to_parquet(_cache_path(code), compression='zstd')
+    except Exception as e:
+        logger.warning(f"  ! Warning: failed to cache series {code} ({e}).")
+
+@functools.lru_cache(maxsize=64)
 def generate_column_range(max_col_str: str) -> List[str]:
     """
     Generates a list of Excel column letters starting from 'B' up to the specified column.
-    
+
     Args:
         max_col_str: The maximum column letter (e.g., 'Z', 'AA').
-        
+
     Returns:
         A list of column letters ['B', 'C', ..., max_col_str].
     """
+    max_idx = _COL_INDEX.get(max_col_str)
+    if max_idx is None:
+        try:
+            max_idx = column_index_from_string(max_col_str)
+        except Exception:
+            return []
+    if max_idx < len(_COL_LETTERS):
+        return _COL_LETTERS[2 : max_idx + 1]
+    return [get_column_letter(i) for i in range(2, max_idx + 1)]
+
+def read_input_config(path: str) -> pd.DataFrame:
+    """
+    Reads the Codigo/Coluna/Aba configuration columns from the input workbook.
+
+    Streams rows with openpyxl in read-only mode instead of pd.read_excel,
+    which parses the whole workbook DOM into memory. Only the three columns
+    of plain values are extracted.
+
+    Args:
+        path: Path to the input xlsx file.
+
+    Returns:
+        DataFrame with 'Codigo', 'Coluna' and 'Aba' columns.
+    """
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
     try:
-        max_idx = column_index_from_string(max_col_str)
-        return [get_column_letter(i) for i in range(2, max_idx + 1)]
-    except Exception:
-        return []
+        ws = wb.active
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            raise ValueError("Input file is empty (no header row).")
+        names = [str(h).strip() if h is not None else '' for h in header]
+        try:
+            positions = {name: names.index(name) for name in ('Codigo', 'Coluna', 'Aba')}
+        except ValueError:
+            raise ValueError(f"Input file must contain 'Codigo', 'Coluna' and 'Aba' columns (found: {names}).")
+
+        codes, cols, abas = [], [], []
+        for row in rows:
+            codes.append(row[positions['Codigo']] if positions['Codigo'] < len(row) else None)
+            cols.append(row[positions['Coluna']] if positions['Coluna'] < len(row) else None)
+            abas.append(row[positions['Aba']] if positions['Aba'] < len(row) else None)
+        return pd.DataFrame({'Codigo': codes, 'Coluna': cols, 'Aba': abas})
+    finally:
+        wb.close()  # Release the underlying zip handle immediately
+
+XLSX_OPTIONS = {'constant_memory': True, 'default_date_format': 'yyyy-mm-dd'}
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+def _write_sheet_file(sheet: str, df: pd.DataFrame, path: str) -> None:
+    """
+    Writes a single sheet to its own xlsx file with xlsxwriter in
+    constant_memory mode (each row is flushed to disk immediately, so memory
+    stays O(1) in rows). Runs on a worker process: XML serialization is
+    CPU-bound, so independent sheets are serialized on separate cores.
+    """
+    wb = xlsxwriter.Workbook(path, XLSX_OPTIONS)
+    ws = wb.add_worksheet(sheet)
+    ws.write_row(0, 0, ['Data'] + list(df.columns))
+    for r, (idx, row) in enumerate(zip(df.index, df.itertuples(index=False, name=None)), start=1):
+        ws.write_datetime(r, 0, idx)
+        # NaN must become None so cells stay blank (matching to_excel behavior)
+        ws.write_row(r, 1, tuple(None if (isinstance(v, float) and v != v) else v for v in row))
+    wb.close()
+
+def _merge_sheet_files(sheet_paths: List[tuple], path: str) -> None:
+    """
+    Streams the per-sheet temp files into the final workbook (openpyxl
+    read-only in, xlsxwriter constant_memory out: values pass through
+    without cell objects piling up on either side).
+    """
+    from openpyxl import load_workbook
+    wb = xlsxwriter.Workbook(path, XLSX_OPTIONS)
+    for sheet, tmp_path in sheet_paths:
+        src = load_workbook(tmp_path, read_only=True)
+        try:
+            ws = wb.add_worksheet(sheet)
+            for r, row in enumerate(src[sheet].iter_rows(values_only=True)):
+                ws.write_row(r, 0, row)
+        finally:
+            src.close()
+    wb.close()
+
+def fast_to_excel(output_dfs: dict, path: str) -> None:
+    """
+    Writes all sheets to an xlsx file using xlsxwriter in constant_memory mode.
+
+    Sheets are serialized in parallel (one temp file per sheet on a
+    ProcessPoolExecutor), then merged into the final workbook. Rows are
+    flushed to disk as they are written, keeping memory flat regardless of
+    sheet size.
+
+    Args:
+        output_dfs: Mapping of sheet name -> DataFrame (index is written as 'Data').
+        path: Destination xlsx file path.
+    """
+    base = os.path.splitext(path)[0]
+    jobs = [(sheet, df, f'{base}.tmp{i}.xlsx') for i, (sheet, df) in enumerate(output_dfs.items())]
+    try:
+        if len(jobs) > 1:
+            with ProcessPoolExecutor() as executor:
+                futures = [executor.submit(_write_sheet_file, sheet, df, tmp_path)
+                           for sheet, df, tmp_path in jobs]
+                for future in futures:
+                    future.result()  # Propagate worker failures
+        else:
+            for sheet, df, tmp_path in jobs:
+                _write_sheet_file(sheet, df, tmp_path)
+        _merge_sheet_files([(sheet, tmp_path) for sheet, _, tmp_path in jobs], path)
+    finally:
+        for _, _, tmp_path in jobs:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+MAX_WORKERS = 5  # Adjust based on system/network limits (threaded fallback path)
+
+# --- Async download path (httpx) ---
+SGS_API_URL = 'https://api.bcb.gov.br/dados/serie/bcdata.sgs.{code}/dados'
+ASYNC_MAX_CONNECTIONS = 32
+ASYNC_TIMEOUT = 60.0
+
+def _parse_sgs_payload(code: int, payload: bytes) -> Optional[pd.DataFrame]:
+    """
+    Builds a single-column DataFrame (column named by code) from the SGS
+    JSON payload. Returns None for empty responses.
+    """
+    data = orjson.loads(payload) if orjson is not None else json.loads(payload)
+    if not data:
+        return None
+    index = pd.to_datetime([r['data'] for r in data], format='%d/%m/%Y')
+    values = pd.to_numeric(pd.Series([r['valor'] for r in data]), errors='coerce')
+    # float32 from the start: missing values stay NaN without ever paying for
+    # a float64 intermediate per series
+    return pd.DataFrame({code: values.to_numpy(dtype=np.float32)}, index=index)
+
+async def _fetch_code(client: 'httpx.AsyncClient', semaphore: asyncio.Semaphore,
+                      code: int, start_date: str,
+                      allow_full_fallback: bool = True) -> Optional[pd.DataFrame]:
+    """
+    Fetches one series from the SGS JSON endpoint, falling back to a full
+    history request (filtered locally) when the ranged request fails or
+    returns nothing (series starting after start_date). Incremental cache
+    refreshes pass allow_full_fallback=False: an empty delta just means no
+    new months were published, so re-downloading the full history is waste.
+    """
+    params = {'formato': 'json'}
+    if start_date:
+        d = datetime.datetime.strptime(start_date, '%Y-%m-%d')
+        params['dataInicial'] = d.strftime('%d/%m/%Y')
+
+    frame = None
+    async with semaphore:
+        try:
+            resp = await client.get(SGS_API_URL.format(code=code), params=params)
+            resp.raise_for_status()
+            frame = _parse_sgs_payload(code, resp.content)
+        except Exception:
+            frame = None
+
+    if frame is None and start_date and allow_full_fallback:
+        # Fallback: full history download and local filtering
+        async with semaphore:
+            try:
+                resp = await client.get(SGS_API_URL.format(code=code), params={'formato': 'json'})
+                resp.raise_for_status()
+                frame = _parse_sgs_payload(code, resp.content)
+            except Exception:
+                frame = None
+        if frame is not None:
+            frame = frame[frame.index >= start_date]
+
+    if frame is None or frame.empty:
+        if allow_full_fallback:
+            logger.warning(f"    - Series {code} failed permanently.")
+        return None
+    return frame
+
+async def _download_all(jobs: List[tuple]) -> List[pd.DataFrame]:
+    """
+    Downloads all requested series concurrently over one shared httpx client.
+
+    Args:
+        jobs: List of (code, start_date, allow_full_fallback) tuples.
+    """
+    semaphore = asyncio.Semaphore(ASYNC_MAX_CONNECTIONS)
+    limits = httpx.Limits(max_connections=ASYNC_MAX_CONNECTIONS)
+    try:
+        client = httpx.AsyncClient(http2=True, limits=limits, timeout=ASYNC_TIMEOUT)
+    except ImportError:
+        # http2 extra (h2) not installed; plain HTTP/1.1 still multiplexes via the pool
+        client = httpx.AsyncClient(limits=limits, timeout=ASYNC_TIMEOUT)
+    async with client:
+        frames = await asyncio.gather(
+            *(_fetch_code(client, semaphore, code, start, allow_full_fallback=fallback)
+              for code, start, fallback in jobs))
+    return [f for f in frames if f is not None]
 
-MAX_WORKERS = 5  # Adjust based on system/network limits
+RETRY_ATTEMPTS = 3
+
+def _get_with_retry(code: int, attempts: int = RETRY_ATTEMPTS) -> pd.DataFrame:
+    """
+    Fetches one series' full history, retrying transient failures with
+    exponential backoff (1s, 2s, ...). Re-raises after the final attempt.
+    """
+    for attempt in range(attempts):
+        try:
+            return sgs.get(code)
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(2 ** attempt)
 
 def process_batch_chunk(chunk: List[int], start_date: str) -> List[pd.DataFrame]:
     """
@@ -47,101 +332,264 @@ def process_batch_chunk(chunk: List[int], start_date: str) -> List[pd.DataFrame]
     try:
         # Batch download attempt (Performance Optimization)
         # Note: Printing in threads might interleave, but acceptable for simple logs
-        print(f"  > Processing batch (series {chunk[0]}...)...")
+        logger.info(f"  > Processing batch (series {chunk[0]}...)...")
         df_chunk = sgs.get(chunk, start=start_date)
         chunk_results.append(df_chunk)
-        
+
     except Exception as e:
-        print(f"  ! FAILURE in batch ({chunk[0]}...). Starting individual recovery mode...")
-        # Fallback: Process individually
+        logger.warning(f"  ! FAILURE in batch ({chunk[0]}...). Starting individual recovery mode...")
+        # Fallback: one full-history request per code, filtered locally.
+        # The endpoint is the same with or without a start date, so the old
+        # ranged first attempt only added a second roundtrip for series that
+        # start after start_date; client-side filtering is free.
         for code in chunk:
             try:
-                # Attempt 1: Strict download with start date
-                ts = sgs.get(code, start=start_date)
-                ts.name = code
-                chunk_results.append(ts)
+                ts = _get_with_retry(code)
             except Exception:
-                try:
-                    # Attempt 2: Full history download and local filtering
-                    # Useful for series starting AFTER start_date
-                    ts = sgs.get(code)
-                    if not ts.empty:
-                        ts = ts[ts.index >= start_date]
-                        if not ts.empty:
-                            ts.name = code
-                            chunk_results.append(ts)
-                        else:
-                            print(f"    - Series {code}: Data retrieved but none within period.")
-                except:
-                    print(f"    - Series {code} failed permanently.")
+                logger.warning(f"    - Series {code} failed permanently.")
+                continue
+            if ts is None or ts.empty:
+                logger.info(f"    - Series {code}: No data retrieved.")
+                continue
+            ts = ts[ts.index >= start_date]
+            if ts.empty:
+                logger.info(f"    - Series {code}: Data retrieved but none within period.")
+                continue
+            ts.name = code
+            chunk_results.append(ts)
     return chunk_results
 
-def download_series_batch(series_codes: List[int], start_date: str) -> pd.DataFrame:
+GAP_THRESHOLD = 1000  # ID distance beyond which codes are assumed unrelated
+
+def _cluster_chunks(codes: List[int], batch_size: int = BATCH_SIZE,
+                    gap_threshold: int = GAP_THRESHOLD) -> List[List[int]]:
+    """
+    Splits sorted codes into chunks of at most batch_size, additionally
+    breaking at large ID gaps: adjacent SGS codes tend to belong to the same
+    series family, so keeping unrelated codes out of a batch means a failing
+    code only dooms its own neighborhood (and its individual-recovery cost).
+
+    Args:
+        codes: Sorted, deduplicated series codes.
+        batch_size: Maximum chunk length.
+        gap_threshold: Gap between consecutive codes that starts a new cluster.
+
+    Returns:
+        List of code chunks ready for batch submission.
+    """
+    if not codes:
+        return []
+    arr = np.asarray(codes)
+    clusters = np.split(arr, np.where(np.diff(arr) > gap_threshold)[0] + 1)
+    chunks = []
+    for cluster in clusters:
+        for i in range(0, len(cluster), batch_size):
+            chunks.append([int(c) for c in cluster[i : i + batch_size]])
+    return chunks
+
+def download_series_batch(series_codes: List[int], start_date: str, master_index: pd.DatetimeIndex,
+                          use_cache: bool = True) -> pd.DataFrame:
     """
     Downloads BCB series in parallel batches with fallback to individual handling on failure.
-    
+
+    Warm series are served from the local Parquet cache; only cold codes hit
+    the network. Pass use_cache=False to force a full refresh.
+
     Args:
         series_codes: List of series codes (integers).
         start_date: Start date string in 'YYYY-MM-DD' format.
-        
+        master_index: Target DatetimeIndex; the result is aligned to it directly.
+        use_cache: Whether to read/write the local series cache.
+
     Returns:
-        DataFrame containing the consolidated data.
+        DataFrame containing the consolidated data, indexed by master_index.
     """
     results: List[pd.DataFrame] = []
-    
+
     # Remove duplicates and ensure integer typing
     series_codes = sorted(list(set(series_codes)))
-    total = len(series_codes)
-    
-    print(f"Starting parallel download of {total} series with {MAX_WORKERS} workers...")
 
-    # Create chunks
-    chunks = [series_codes[i : i + BATCH_SIZE] for i in range(0, total, BATCH_SIZE)]
-    
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        # Submit all tasks
-        future_to_chunk = {executor.submit(process_batch_chunk, chunk, start_date): chunk for chunk in chunks}
-        
-        # Process results as they complete
-        for future in as_completed(future_to_chunk):
-            try:
-                chunk_data = future.result()
-                results.extend(chunk_data)
-            except Exception as e:
-                print(f"CRITICAL WORKER ERROR: {e}")
+    # Cache Partitioning: warm codes are read locally, stale codes fetch only
+    # the months published since their last cached date, cold codes download
+    # the full history
+    cold_codes = series_codes
+    incremental = {}  # code -> (cached frame, fetch start 'YYYY-MM-DD')
+    if use_cache:
+        cold_codes = []
+        today = pd.Timestamp.today()
+        for code in series_codes:
+            cached = load_cached_series(code)
+            if cached is not None:
+                results.append(cached)
+                continue
+            stale = load_cached_series(code, ttl=None)
+            if stale is not None and not stale.empty:
+                fetch_start = stale.index.max() + pd.offsets.MonthBegin(1)
+                if fetch_start > today:
+                    # No newer month can exist yet: serve the cached data and
+                    # refresh its freshness stamp
+                    results.append(stale)
+                    try:
+                        os.utime(_cache_path(code))
+                    except OSError:
+                        pass
+                    continue
+                incremental[code] = (stale, fetch_start.strftime('%Y-%m-%d'))
+            else:
+                cold_codes.append(code)
+        logger.info(f"Cache: {len(results)} warm series, {len(incremental)} incremental updates, "
+                    f"{len(cold_codes)} full downloads.")
+
+    downloaded: List[pd.DataFrame] = []
+    if cold_codes or incremental:
+        if httpx is not None:
+            logger.info(f"Starting async download of {len(cold_codes) + len(incremental)} series "
+                        f"({ASYNC_MAX_CONNECTIONS} max connections)...")
+            jobs = [(code, start_date, True) for code in cold_codes]
+            # Delta fetches: an empty response just means no new data, so the
+            # full-history fallback is disabled
+            jobs += [(code, fetch_start, False) for code, (_, fetch_start) in incremental.items()]
+            downloaded = asyncio.run(_download_all(jobs))
+        else:
+            # Fallback: threaded batch download via python-bcb
+            logger.info(f"httpx not installed. Starting parallel download of "
+                        f"{len(cold_codes) + len(incremental)} series with {MAX_WORKERS} workers...")
+            chunks = _cluster_chunks(cold_codes)
+
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                # Submit all tasks (guard against accidental duplicate chunks)
+                seen_chunks = set()
+                future_to_chunk = {}
+                for chunk in chunks:
+                    key = tuple(chunk)
+                    if key in seen_chunks:
+                        continue
+                    seen_chunks.add(key)
+                    future_to_chunk[executor.submit(process_batch_chunk, chunk, start_date)] = chunk
+                # Delta fetches run as single-code chunks with their own start date
+                for code, (_, fetch_start) in incremental.items():
+                    future_to_chunk[executor.submit(process_batch_chunk, [code], fetch_start)] = [code]
+
+                # Process results as they complete
+                for future in as_completed(future_to_chunk):
+                    try:
+                        downloaded.extend(future.result())
+                    except Exception as e:
+                        logger.error(f"CRITICAL WORKER ERROR: {e}")
+
+        # Incremental merge: splice each delta onto its cached history; codes
+        # whose delta fetch returned nothing keep serving the cached data
+        if incremental:
+            merged_codes = set()
+            for i, res in enumerate(downloaded):
+                frame = res.to_frame() if isinstance(res, pd.Series) else res
+                if len(frame.columns) != 1:
+                    continue
+                try:
+                    code = int(frame.columns[0])
+                except (TypeError, ValueError):
+                    continue
+                if code not in incremental:
+                    continue
+                cached = incremental[code][0].set_axis([code], axis=1)
+                delta = frame.set_axis([code], axis=1)
+                downloaded[i] = pd.concat([cached[cached.index < delta.index.min()], delta])
+                merged_codes.add(code)
+            for code, (cached, _) in incremental.items():
+                if code not in merged_codes:
+                    results.append(cached)
+
+        results.extend(downloaded)
+        if use_cache:
+            for res in downloaded:
+                frame = res.to_frame() if isinstance(res, pd.Series) else res
+                for col in frame.columns:
+                    try:
+                        store_cached_series(int(col), frame[[col]])
+                    except (TypeError, ValueError):
+                        continue
 
     # Data Consolidation
     if results:
-        print("Consolidating data...", end=" ")
-        df_final = pd.concat(results, axis=1)
-        # Standardize columns as integers for optimized indexing
-        df_final.columns = pd.to_numeric(df_final.columns, errors='coerce').fillna(0).astype(int)
-        print("OK")
-        return df_final
+        logger.info("Consolidating data...")
+        # Scatter every downloaded series into a single pre-allocated buffer
+        # aligned to master_index, instead of concat + reindex (one contiguous
+        # allocation, no axis=1 index-union pass). The resulting frame is
+        # backed by exactly one C-contiguous float32 block, so downstream
+        # column takes and row iteration never touch fragmented per-series
+        # chunks.
+        codes_order = series_codes  # already sorted and deduplicated above
+        col_idx = {c: i for i, c in enumerate(codes_order)}
+        arr = np.full((len(master_index), len(codes_order)), np.nan, dtype=np.float32)
+
+        # Align on raw int64 epochs with searchsorted: master_index is sorted,
+        # so binary search beats get_indexer's per-call hashmap construction
+        target_i8 = master_index.asi8
+
+        for res in results:
+            frame = res.to_frame() if isinstance(res, pd.Series) else res
+            # Cast to the master index's own datetime64 unit so the raw
+            # epoch integers are comparable
+            src_i8 = frame.index.values.astype(master_index.dtype).view('i8')
+            pos = np.minimum(np.searchsorted(target_i8, src_i8), len(target_i8) - 1)
+            mask = target_i8[pos] == src_i8
+            if not mask.any():
+                continue
+            for k, col in enumerate(frame.columns):
+                try:
+                    code = int(col)
+                except (TypeError, ValueError):
+                    continue
+                j = col_idx.get(code)
+                if j is None:
+                    continue
+                vals = frame.iloc[:, k].to_numpy()
+                arr[pos[mask], j] = vals[mask].astype(np.float32, copy=False)
+
+        return pd.DataFrame(arr, index=master_index, columns=codes_order)
     else:
-        return pd.DataFrame()
+        return pd.DataFrame(index=master_index)
+
+def export_columnar(output_dfs: dict, fmt: str) -> None:
+    """
+    Writes one file per sheet in a columnar format ('parquet' or 'feather').
+
+    Orders of magnitude faster than xlsx to write and re-read, and preserves
+    dtypes end-to-end; intended for downstream Python/BI consumers that do
+    not require an Excel workbook.
+    """
+    for sheet, df in output_dfs.items():
+        out_path = os.path.join(BASE_DIR, f'{sheet}.{fmt}')
+        print(f"Saving {out_path} ...")
+        df = df.rename(columns=str)  # Columnar writers require string column names
+        if fmt == 'parquet':
+            df.to_parquet(out_path, engine='pyarrow', compression='zstd')
+        else:
+            df.reset_index().to_feather(out_path)  # Feather has no index concept
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Extracts BCB/SGS series into per-sheet outputs.')
+    parser.add_argument(
+        '--format', choices=['xlsx', 'parquet', 'feather'], default='xlsx',
+        help="Output format: 'xlsx' (default, Excel-compatible single workbook) or "
+             "'parquet'/'feather' (one columnar file per sheet; far faster to write "
+             "and re-read, preserves dtypes)."
+    )
+    return parser.parse_args(argv)
 
 def main():
     print("=== Extract.py: Batch Extraction Process Started ===")
+
+    args = parse_args()
     
     start_time = datetime.datetime.now()
     print(f"Execution Start: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"Base Directory: {BASE_DIR}")
     
     exit_code = 0
-    
-    # --- Automatic Safety Backup ---
-    if os.path.exists(OUTPUT_FILE):
-        try:
-            print(f"Existing output file detected. Creating backup at: {BACKUP_FILE} ...", end=" ")
-            shutil.copy2(OUTPUT_FILE, BACKUP_FILE)
-            print("SUCCESS.")
-        except IOError as e:
-            print(f"\narting warning: Backup creation failed ({e}). Execution will continue.")
-        except Exception as e:
-            print(f"\nWARNING: Unexpected error creating backup ({e}). Execution will continue.")
-    else:
-        print("Output file not found. Backup skipped (first run or file removed).")
+
+    # The previous output is preserved by an atomic rename at export time
+    # (no upfront byte copy; see the final export step).
 
     try:
         # 1. Master Index Generation (Monthly Frequency)
@@ -152,16 +600,21 @@ def main():
         # 2. Input File Reading
         try:
             print(f"Reading configuration file: {INPUT_FILE}")
-            df_input = pd.read_excel(INPUT_FILE, usecols=['Codigo', 'Coluna', 'Aba'])
+            df_input = read_input_config(INPUT_FILE)
             
             # Data Cleaning and Processing
             df_input = df_input.dropna(subset=['Codigo', 'Aba'])
-            df_input['Aba'] = df_input['Aba'].astype(str).str.strip()
-            df_input['Coluna'] = df_input['Coluna'].astype(str).str.strip().str.upper()
+            # Aba/Coluna are low-cardinality strings; categoricals cut memory
+            # and speed up the per-sheet masking below
+            df_input['Aba'] = df_input['Aba'].astype(str).str.strip().astype('category')
+            df_input['Coluna'] = df_input['Coluna'].astype(str).str.strip().str.upper().astype('category')
             
-            # Series Code Sanitization
-            df_input['Codigo_Clean'] = pd.to_numeric(df_input['Codigo'], errors='coerce').fillna(0).astype(int)
-            df_input = df_input[df_input['Codigo_Clean'] > 0]
+            # Series Code Sanitization (one pass: invalid codes coerce to NaN,
+            # which fails the > 0 filter, so no fillna intermediate is needed)
+            codigo_num = pd.to_numeric(df_input['Codigo'], errors='coerce')
+            valid = codigo_num > 0
+            df_input = df_input[valid]
+            df_input['Codigo_Clean'] = codigo_num[valid].astype('int64')
             
         except FileNotFoundError:
             print(f"CRITICAL ERROR: Input file not found at: {INPUT_FILE}")
@@ -180,57 +633,98 @@ def main():
             exit_code = 1
             return
 
-        df_global_data = download_series_batch(unique_codes, START_DATE)
-        
-        # Reindexing to Master Index
-        if not df_global_data.empty:
-            df_global_data = df_global_data.reindex(master_index)
+        df_global_data = download_series_batch(unique_codes, START_DATE, master_index)
 
         # 4. Data Distribution by Sheet
+        # Column letters repeat across sheets: resolve letter -> index once
+        # via a lookup table instead of .apply per sheet iteration
+        letter_to_idx = {}
+        for letter in df_input['Coluna'].unique():
+            idx_val = _COL_INDEX.get(letter)
+            if idx_val is None:
+                try:
+                    idx_val = column_index_from_string(letter)  # Beyond the precomputed table
+                except Exception:
+                    idx_val = np.nan  # Invalid letter: sheet loop skips it
+            letter_to_idx[letter] = idx_val
+        df_input['col_idx'] = df_input['Coluna'].map(letter_to_idx)
+
+        # One shared view of the consolidated block plus a code -> column-position
+        # map; each sheet below is built by a single fancy-indexed slice of it
+        global_values = df_global_data.to_numpy(dtype=np.float32, copy=False)
+        code_to_col = {code: i for i, code in enumerate(df_global_data.columns)}
+
         output_dfs = {}
         unique_sheets = df_input['Aba'].unique()
 
         print(f"\nDistributing data to {len(unique_sheets)} sheets...")
 
-        for sheet in unique_sheets:
-            mask = df_input['Aba'] == sheet
-            df_config = df_input[mask]
-            
+        def build_sheet(sheet: str) -> Optional[pd.DataFrame]:
+            """
+            Builds one sheet's DataFrame. Sheets are independent and the heavy
+            work is a NumPy fancy-indexed copy (GIL released), so this runs on
+            a thread pool below. Returns None if the sheet has no valid columns.
+            """
+            df_config = df_input[df_input['Aba'] == sheet]
+
             # Sheet Column Structure Definition
             try:
-                col_indices = df_config['Coluna'].apply(column_index_from_string)
-                max_col_str = get_column_letter(col_indices.max())
+                max_idx = int(df_config['col_idx'].max())
+                max_col_str = _COL_LETTERS[max_idx] if max_idx < len(_COL_LETTERS) else get_column_letter(max_idx)
                 target_cols = generate_column_range(max_col_str)
             except:
-                continue
-                
-            # Sheet DataFrame Initialization
-            df_sheet = pd.DataFrame(index=master_index, columns=target_cols)
-            
-            # Data Mapping
-            for _, row in df_config.iterrows():
-                col_dest = row['Coluna']
-                cod_orig = row['Codigo_Clean']
-                
-                # Data Transfer
-                if cod_orig in df_global_data.columns:
-                    df_sheet[col_dest] = df_global_data[cod_orig]
-            
+                return None
+
+            # Data Mapping (one NumPy slice-assign into a fresh buffer instead
+            # of per-column pandas __setitem__/reindex)
+            dest_map = dict(zip(df_config['Coluna'], df_config['Codigo_Clean']))  # letter -> code, last wins
+            letter_pos = {letter: j for j, letter in enumerate(target_cols)}
+            src_cols, dst_cols = [], []
+            for letter, code in dest_map.items():
+                i = code_to_col.get(code)
+                j = letter_pos.get(letter)
+                if i is None or j is None:
+                    continue
+                src_cols.append(i)
+                dst_cols.append(j)
+
+            out = np.full((len(master_index), len(target_cols)), np.nan, dtype=np.float32)
+            if src_cols:
+                out[:, dst_cols] = global_values[:, src_cols]
+            df_sheet = pd.DataFrame(out, index=master_index, columns=target_cols)
+
             # Post-processing: Rename headers (Letter -> Series Code)
             # We map the series code to the column, keeping unmapped columns (gaps) as letters or empty if desired.
             # User request: "Header equals Series Code"
             rename_map = dict(zip(df_config['Coluna'], df_config['Codigo_Clean']))
             df_sheet.rename(columns=rename_map, inplace=True)
-            
-            output_dfs[sheet] = df_sheet
+
+            return df_sheet
+
+        # Each sheet reads shared data and writes its own private buffer, so
+        # no locking is needed; map preserves the input sheet order
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            built_sheets = list(executor.map(build_sheet, unique_sheets))
+
+        for sheet, df_sheet in zip(unique_sheets, built_sheets):
+            if df_sheet is not None:
+                output_dfs[sheet] = df_sheet
 
         # 5. Final File Export
         if output_dfs:
             try:
-                print(f"Saving output file: {OUTPUT_FILE} ...")
-                with pd.ExcelWriter(OUTPUT_FILE, engine='openpyxl') as writer:
-                    for sheet, df in output_dfs.items():
-                        df.to_excel(writer, sheet_name=sheet)
+                if args.format == 'xlsx':
+                    print(f"Saving output file: {OUTPUT_FILE} ...")
+                    tmp_output = OUTPUT_FILE + '.tmp'
+                    fast_to_excel(output_dfs, tmp_output)
+                    # Atomic swap: the fully-written tmp file replaces the
+                    # output, and the previous output becomes the backup via
+                    # rename (a directory-entry update, not a byte copy)
+                    if os.path.exists(OUTPUT_FILE):
+                        os.replace(OUTPUT_FILE, BACKUP_FILE)
+                    os.replace(tmp_output, OUTPUT_FILE)
+                else:
+                    export_columnar(output_dfs, args.format)
                 print("Process completed successfully.")
             except PermissionError:
                 print(f"CRITICAL ERROR: Permission denied saving {OUTPUT_FILE}. Close the file if open.")
@@ -247,6 +741,12 @@ def main():
         exit_code = 1
 
     finally:
+        # Flush any queued worker log records before the final markers
+        try:
+            _log_listener.stop()
+        except Exception:
+            pass
+
         # End Time Marker
         end_time = datetime.datetime.now()
         duration = end_time - start_time